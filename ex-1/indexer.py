@@ -1,8 +1,12 @@
 import os
 import sys
 import json
+import time
 import base64
-import requests
+import asyncio
+import itertools
+import httpx
+import orjson
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -18,13 +22,23 @@ CONFIG = {
     'FILE_EXTENSIONS_TO_INDEX': ['.py', '.md', '.txt'],
     # For the prototype, we'll limit the number of files to avoid long runs
     'MAX_FILES_TO_INDEX': 20,
-    'OUTPUT_FILE': 'indexed_repo.json'
+    # Maximum number of API requests in flight at once
+    'MAX_CONCURRENT_REQUESTS': 10,
+    # Pause until the rate limit window resets once fewer requests than this remain
+    'RATE_LIMIT_BUFFER': 100,
+    # Number of blobs requested per GraphQL query (keeps us under the node limit)
+    'GRAPHQL_BATCH_SIZE': 100,
+    # Newline-delimited JSON: a header line, one line per file, then a commit history line
+    'OUTPUT_FILE': 'indexed_repo.ndjson',
+    # ETags and blob contents from the previous run, so unchanged data isn't re-downloaded
+    'CACHE_FILE': '.indexer_cache.json'
 }
 # --- END CONFIGURATION ---
 
 # Retrieve the token from environment variables
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 API_URL = 'https://api.github.com'
+GRAPHQL_URL = f'{API_URL}/graphql'
 
 # Set up headers for all API requests
 HEADERS = {
@@ -33,7 +47,154 @@ HEADERS = {
     'X-GitHub-Api-Version': '2022-11-28'
 }
 
-def main():
+def load_cache(path):
+    """Load the ETag/blob cache written by the previous run, or an empty one."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    cache.setdefault('responses', {})
+    cache.setdefault('blobs', {})
+    return cache
+
+def save_cache(path, cache):
+    """Persist the cache for the next run."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+
+class GitHubClient:
+    """Small wrapper around an httpx.AsyncClient for GitHub API calls.
+
+    Bounds the number of requests in flight, revalidates GETs against cached ETags
+    and watches the X-RateLimit-* headers, sleeping until the window resets instead
+    of running into 403s.
+    """
+
+    def __init__(self, session, cache, new_cache):
+        self.session = session
+        self.cache = cache
+        self.new_cache = new_cache
+        self.sem = asyncio.Semaphore(CONFIG['MAX_CONCURRENT_REQUESTS'])
+        # REST and GraphQL calls draw from separate quotas ("core" and "graphql")
+        self.remaining = {}
+        self.reset = {}
+        # Per resource, the time every request holds off until once the quota runs low
+        self.paused_until = {}
+
+    def _update_rate_limit(self, resource, headers):
+        if 'X-RateLimit-Remaining' not in headers:
+            return
+        resource = headers.get('X-RateLimit-Resource', resource)
+        self.remaining[resource] = int(headers['X-RateLimit-Remaining'])
+        self.reset[resource] = int(headers['X-RateLimit-Reset'])
+
+    async def _wait_for_quota(self, resource):
+        if resource not in self.paused_until and \
+                self.remaining.get(resource, CONFIG['RATE_LIMIT_BUFFER']) < CONFIG['RATE_LIMIT_BUFFER']:
+            self.paused_until[resource] = self.reset[resource]
+            sleep_for = max(0, self.reset[resource] - time.time())
+            print(f"  ⏳ Only {self.remaining[resource]} '{resource}' requests left, sleeping {sleep_for:.0f}s until reset...")
+        # Concurrent callers all wait on the same pause, which is only lifted once it has passed
+        while resource in self.paused_until:
+            sleep_for = self.paused_until[resource] - time.time()
+            if sleep_for <= 0:
+                del self.paused_until[resource]
+                self.remaining.pop(resource, None)
+                break
+            await asyncio.sleep(sleep_for)
+
+    async def _request(self, method, url, **kwargs):
+        """Send a request and return (status, headers, body); body is None for 304 Not Modified."""
+        resource = 'graphql' if url == GRAPHQL_URL else 'core'
+        while True:
+            await self._wait_for_quota(resource)
+            async with self.sem:
+                res = await self.session.request(method, url, **kwargs)
+
+            self._update_rate_limit(resource, res.headers)
+            exhausted = res.status_code in (403, 429) and (
+                self.remaining.get(resource) == 0 or 'Retry-After' in res.headers
+            )
+            if not exhausted:
+                if res.status_code == 304:
+                    return res.status_code, res.headers, None
+                res.raise_for_status()
+                return res.status_code, res.headers, res.json()
+            retry_after = int(res.headers.get('Retry-After', 0))
+
+            # Out of quota: back off until the window resets, then retry
+            sleep_for = retry_after or max(0, self.reset.get(resource, time.time()) - time.time())
+            print(f"  ⏳ Rate limited on {url}, retrying in {sleep_for:.0f}s...")
+            self.paused_until[resource] = max(self.paused_until.get(resource, 0), time.time() + sleep_for)
+
+    async def get(self, url, etag=True):
+        """GET a GitHub API URL and return the decoded JSON body.
+
+        Sends the ETag from the previous run as If-None-Match; a 304 reuses the cached
+        body and does not count against the rate limit. Pass etag=False for responses
+        that shouldn't be kept in the cache.
+        """
+        if not etag:
+            _, _, body = await self._request('GET', url)
+            return body
+        cached = self.cache['responses'].get(url)
+        headers = {'If-None-Match': cached['etag']} if cached else {}
+        status, res_headers, body = await self._request('GET', url, headers=headers)
+        if status == 304:
+            body = cached['body']
+        else:
+            etag = res_headers.get('ETag')
+            cached = {'etag': etag, 'body': body} if etag else None
+        if cached:
+            self.new_cache['responses'][url] = cached
+        return body
+
+    async def post(self, url, payload):
+        """POST a JSON payload and return the decoded JSON body."""
+        _, _, body = await self._request('POST', url, json=payload)
+        return body
+
+async def fetch_blob(client, file):
+    """Fetch one blob's full contents through the REST API, or None if it isn't UTF-8 text."""
+    # Blob URLs are keyed by SHA, so the blob cache already covers them; skip the ETag cache
+    blob = await client.get(file['url'], etag=False)
+    try:
+        return base64.b64decode(blob['content']).decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+
+async def fetch_blob_batch(client, commit_sha, files):
+    """Fetch the text of many blobs with one GraphQL query."""
+    # One aliased `object` field per file; json.dumps gives us a safely quoted string literal
+    fields = []
+    for i, file in enumerate(files):
+        expression = json.dumps(f"{commit_sha}:{file['path']}")
+        fields.append(f"file{i}: object(expression: {expression}) {{ ... on Blob {{ text isTruncated isBinary }} }}")
+    fields = "\n".join(fields)
+    query = f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ {fields} }} }}"
+    payload = {'query': query, 'variables': {'owner': CONFIG['OWNER'], 'name': CONFIG['REPO']}}
+
+    body = await client.post(GRAPHQL_URL, payload)
+    if body.get('errors'):
+        raise RuntimeError(f"GraphQL query failed: {body['errors']}")
+
+    repository = body['data']['repository']
+    results = []
+    for i, file in enumerate(files):
+        blob = repository[f'file{i}'] or {}
+        text = blob.get('text')
+        if blob.get('isTruncated') and not blob.get('isBinary'):
+            # GraphQL cuts the text of large blobs short; the REST blob endpoint returns it whole
+            text = await fetch_blob(client, file)
+        results.append((file['path'], text))
+    return results
+
+def write_record(out, record):
+    """Append one record to the NDJSON index as a single line."""
+    out.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+
+async def main():
     """Main function to orchestrate the indexing."""
     print("Starting GitHub repository indexing...")
 
@@ -41,97 +202,124 @@ def main():
         print("❌ ERROR: GITHUB_TOKEN is not set. Please set it as an environment variable.")
         sys.exit(1)
 
+    # Written first and only moved over OUTPUT_FILE once complete
+    tmp_output = CONFIG['OUTPUT_FILE'] + '.tmp'
     try:
-        # 1. Get the SHA of the latest commit on the default branch
-        print(f"[1/5] Fetching default branch info for {CONFIG['OWNER']}/{CONFIG['REPO']}...")
-        repo_info_res = requests.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}", headers=HEADERS)
-        repo_info_res.raise_for_status()
-        repo_info = repo_info_res.json()
-        default_branch = repo_info['default_branch']
-
-        branch_info_res = requests.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}/branches/{default_branch}", headers=HEADERS)
-        branch_info_res.raise_for_status()
-        latest_commit_sha = branch_info_res.json()['commit']['sha']
-        print(f"✅ Default branch is '{default_branch}' at commit SHA: {latest_commit_sha}")
-
-        # 2. Get the entire repository file tree
-        print("[2/5] Fetching repository file tree...")
-        tree_res = requests.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}/git/trees/{latest_commit_sha}?recursive=1", headers=HEADERS)
-        tree_res.raise_for_status()
-        all_files = tree_res.json()['tree']
-
-        # 3. Filter for relevant files based on extension
-        # Note: file['path'].endswith() takes a tuple of extensions
-        extensions_tuple = tuple(CONFIG['FILE_EXTENSIONS_TO_INDEX'])
-        files_to_index = []
-        for file in all_files:
-            if file['type'] == 'blob' and file['path'].endswith(extensions_tuple):
-                files_to_index.append(file)
-        files_to_index = files_to_index[:CONFIG['MAX_FILES_TO_INDEX']]
-
-        print(f"✅ Found {len(files_to_index)} files to index.")
-        # 4. Fetch the content for each file
-        print("[3/5] Fetching content for each file...")
-        indexed_files = []
-        for file in files_to_index:
-            blob_res = requests.get(file['url'], headers=HEADERS)
-            blob_res.raise_for_status()
-            blob_content_base64 = blob_res.json()['content']
-            
-            # Decode the base64 content
-            try:
-                decoded_content = base64.b64decode(blob_content_base64).decode('utf-8')
-                indexed_files.append({'path': file['path'], 'content': decoded_content})
-            except UnicodeDecodeError:
-                print(f"  ⚠️  Could not decode file: {file['path']} (skipping)")
-
-        print("✅ All file contents fetched.")
-
-        # 5. Fetch recent commit history for context
-        print("[4/5] Fetching commit history...")
-        commits_res = requests.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}/commits?per_page=10", headers=HEADERS)
-        commits_res.raise_for_status()
-        # commit_history = [
-        #     {
-        #         'sha': commit['sha'],
-        #         'author': commit['commit']['author']['name'],
-        #         'date': commit['commit']['author']['date'],
-        #         'message': commit['commit']['message']
-        #     } for commit in commits_res.json()
-        # ]
-
-        commit_history = []
-        for commit in commits_res.json():
-            commit_info = {
-                'sha': commit['sha'],
-                'author': commit['commit']['author']['name'], 
-                'date': commit['commit']['author']['date'],
-                'message': commit['commit']['message']
-            }
-            commit_history.append(commit_info)
-            
-        commit_history = []
-        print("✅ Commit history fetched.")
-
-        # Assemble the final JSON object
-        final_output = {
-            'repository': f"{CONFIG['OWNER']}/{CONFIG['REPO']}",
-            'indexedAt': datetime.utcnow().isoformat() + "Z",
-            'files': indexed_files,
-            'commitHistory': commit_history
-        }
-
-        # Write to output file
-        print(f"[5/5] Writing all data to {CONFIG['OUTPUT_FILE']}...")
-        with open(CONFIG['OUTPUT_FILE'], 'w', encoding='utf-8') as f:
-            json.dump(final_output, f, indent=2)
+        cache = load_cache(CONFIG['CACHE_FILE'])
+        new_cache = {'responses': {}, 'blobs': {}}
+
+        # A single HTTP/2 client multiplexes every call over one connection; redirects are
+        # followed like requests/aiohttp did, since GitHub answers 301 for renamed repos
+        async with httpx.AsyncClient(http2=True, headers=HEADERS, timeout=30, follow_redirects=True) as session:
+            client = GitHubClient(session, cache, new_cache)
+
+            # 1. Get the SHA of the latest commit on the default branch
+            print(f"[1/5] Fetching default branch info for {CONFIG['OWNER']}/{CONFIG['REPO']}...")
+            repo_info = await client.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}")
+            default_branch = repo_info['default_branch']
+
+            branch_info = await client.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}/branches/{default_branch}")
+            latest_commit_sha = branch_info['commit']['sha']
+            print(f"✅ Default branch is '{default_branch}' at commit SHA: {latest_commit_sha}")
+
+            # 2. Get the entire repository file tree
+            print("[2/5] Fetching repository file tree...")
+            tree = await client.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}/git/trees/{latest_commit_sha}?recursive=1")
+            all_files = tree['tree']
+
+            # 3. Filter for relevant files based on extension
+            # Note: file['path'].endswith() takes a tuple of extensions.
+            # islice stops scanning the tree as soon as enough files have matched.
+            extensions_tuple = tuple(CONFIG['FILE_EXTENSIONS_TO_INDEX'])
+            matching_files = (
+                file for file in all_files
+                if file['type'] == 'blob' and file['path'].endswith(extensions_tuple)
+            )
+            files_to_index = list(itertools.islice(matching_files, CONFIG['MAX_FILES_TO_INDEX']))
+
+            print(f"✅ Found {len(files_to_index)} files to index.")
+            # 4. Fetch the content for each file, batched into GraphQL queries.
+            # A blob whose SHA matches the cached one is unchanged, so it isn't requested at all.
+            # Records go to a temporary file in tree order, so the index doesn't depend on
+            # which blobs changed or which batch answered first.
+            print("[3/5] Fetching content for each file...")
+            with open(tmp_output, 'wb') as out:
+                write_record(out, {
+                    'repository': f"{CONFIG['OWNER']}/{CONFIG['REPO']}",
+                    'indexedAt': datetime.utcnow().isoformat() + "Z",
+                })
+
+                files_to_fetch = []
+                for file in files_to_index:
+                    cached = cache['blobs'].get(file['path'])
+                    if cached and cached['sha'] == file['sha']:
+                        new_cache['blobs'][file['path']] = cached
+                    else:
+                        files_to_fetch.append(file)
+                print(f"  {len(files_to_index) - len(files_to_fetch)} unchanged, {len(files_to_fetch)} to download.")
+
+                blob_shas = {file['path']: file['sha'] for file in files_to_fetch}
+                batch_size = CONFIG['GRAPHQL_BATCH_SIZE']
+                batches = [files_to_fetch[i:i + batch_size] for i in range(0, len(files_to_fetch), batch_size)]
+                for batch in asyncio.as_completed([fetch_blob_batch(client, latest_commit_sha, b) for b in batches]):
+                    for path, content in await batch:
+                        # GraphQL returns `text: null` for binary blobs
+                        # Cached either way, so an unchanged binary blob isn't requested again
+                        new_cache['blobs'][path] = {'sha': blob_shas[path], 'content': content}
+                        if content is None:
+                            print(f"  ⚠️  Could not decode file: {path} (skipping)")
+
+                for file in files_to_index:
+                    # A None content marks a binary blob; it's left out of the index
+                    content = new_cache['blobs'][file['path']]['content']
+                    if content is not None:
+                        write_record(out, {'path': file['path'], 'content': content})
+
+                print("✅ All file contents fetched.")
+
+                # 5. Fetch recent commit history for context
+                print("[4/5] Fetching commit history...")
+                commits = await client.get(f"{API_URL}/repos/{CONFIG['OWNER']}/{CONFIG['REPO']}/commits?per_page=10")
+                # commit_history = [
+                #     {
+                #         'sha': commit['sha'],
+                #         'author': commit['commit']['author']['name'],
+                #         'date': commit['commit']['author']['date'],
+                #         'message': commit['commit']['message']
+                #     } for commit in commits
+                # ]
+
+                commit_history = []
+                for commit in commits:
+                    commit_info = {
+                        'sha': commit['sha'],
+                        'author': commit['commit']['author']['name'], 
+                        'date': commit['commit']['author']['date'],
+                        'message': commit['commit']['message']
+                    }
+                    commit_history.append(commit_info)
+                    
+                commit_history = []
+                print("✅ Commit history fetched.")
+
+                # Commits go on the last line, marked by the "__commits__" key
+                print(f"[5/5] Writing all data to {CONFIG['OUTPUT_FILE']}...")
+                write_record(out, {'__commits__': commit_history})
+
+        # Only replace the previous index once the new one is complete
+        os.replace(tmp_output, CONFIG['OUTPUT_FILE'])
+        save_cache(CONFIG['CACHE_FILE'], new_cache)
 
         print(f"\n🎉 Indexing complete! Check the '{CONFIG['OUTPUT_FILE']}' file.")
 
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         print(f"❌ API Error: {e.response.status_code} - {e.response.text}")
     except Exception as e:
         print(f"❌ An unexpected error occurred: {e}")
+    finally:
+        # After a failed run, don't leave the partial index lying around
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
@@ -1,8 +1,11 @@
 from abc import ABC
 # Updated imports as requested
-from tree_sitter import Language, Parser, Query, QueryCursor
+from tree_sitter import Language, Node, Parser, Query, QueryCursor
 from tree_sitter_language_pack import get_parser, get_language
+from collections.abc import Callable
+from dataclasses import dataclass
 from enum import Enum
+from functools import cached_property, lru_cache
 import logging
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -14,65 +17,48 @@ class LanguageEnum(Enum):
     JAVASCRIPT = "javascript"
     UNKNOWN = "unknown"
 
+# Node types that count as a doc comment when they sit directly above a definition
+DOC_COMMENT_TYPES = frozenset({'comment', 'block_comment', 'line_comment'})
+
+# Each 'definition_query' has one pattern for class names and one or more patterns
+# that match a method/function anywhere in the tree; which class a method belongs to
+# is worked out afterwards from its ancestors, so methods in bodies the class pattern
+# doesn't describe (interfaces, enums, anonymous classes, `;`-separated members)
+# are still found.
 LANGUAGE_QUERIES = {
     LanguageEnum.JAVA: {
-        'class_query': """
+        'definition_query': """
             (class_declaration
                 name: (identifier) @class.name)
-        """,
-        'method_query': """
-            [
-                (method_declaration
-                    name: (identifier) @method.name)
-                (constructor_declaration
-                    name: (identifier) @method.name)
-            ]
-        """,
-        'doc_query': """
-            ((block_comment) @comment)
+            (method_declaration
+                name: (identifier) @method.name)
+            (constructor_declaration
+                name: (identifier) @method.name)
         """
     },
     LanguageEnum.PYTHON: {
-        'class_query': """
+        'definition_query': """
             (class_definition
                 name: (identifier) @class.name)
-        """,
-        'method_query': """
             (function_definition
-                name: (identifier) @function.name)
-        """,
-        'doc_query': """
-            (expression_statement
-                (string) @comment)
+                name: (identifier) @method.name)
         """
     },
     LanguageEnum.RUST: {
-        'class_query': """
+        # Rust methods live in impl blocks rather than the struct, so functions stay class-less
+        'definition_query': """
             (struct_item
                 name: (type_identifier) @class.name)
-        """,
-        'method_query': """
             (function_item
-                name: (identifier) @function.name)
-        """,
-        'doc_query': """
-            [
-                (line_comment) @comment
-                (block_comment) @comment
-            ]
+                name: (identifier) @method.name)
         """
     },
     LanguageEnum.JAVASCRIPT: {
-        'class_query': """
+        'definition_query': """
             (class_declaration
                 name: (identifier) @class.name)
-        """,
-        'method_query': """
             (method_definition
                 name: (property_identifier) @method.name)
-        """,
-        'doc_query': """
-            ((comment) @comment)
         """
     },
     # Add other languages as needed
@@ -84,155 +70,177 @@ class TreesitterMethodNode:
         name: str,
         doc_comment: str,
         method_source_code: str,
-        node,
-        class_name: str = None
+        node: Node,
+        class_name: str | None = None,
+        class_node: Node | None = None
     ):
         self.name = name
         self.doc_comment = doc_comment
         self.method_source_code = method_source_code
         self.node = node
         self.class_name = class_name
+        # The enclosing class's node; unlike the name it tells same-named classes apart
+        self.class_node = class_node
 
 class TreesitterClassNode:
     def __init__(
         self,
         name: str,
-        method_declarations: list,
-        node,
+        method_declarations: list[str],
+        node: Node,
     ):
         self.name = name
-        self.source_code = node.text.decode()
         self.method_declarations = method_declarations
         self.node = node
 
+    @cached_property
+    def source_code(self) -> str:
+        # Decoded on first access only; most callers never need the full class body
+        return self.node.text.decode() if self.node.text else ''
+
+@dataclass(slots=True)
+class ParsedFile:
+    """Plain-data parse result, in the shape the index/visualiser uses.
+
+    Holds no tree-sitter nodes, so it can be pickled and the syntax tree is freed
+    as soon as parsing is done.
+    """
+    classes: list[dict]
+    functions: list[dict]
+
+@lru_cache(maxsize=None)
+def _load_language(name: str) -> tuple[Parser, Language]:
+    # Loading a grammar is per process work; share it between all users of a language
+    return get_parser(name), get_language(name)
+
 class Treesitter(ABC):
     def __init__(self, language: LanguageEnum):
         self.language_enum = language
-        self.parser = get_parser(language.value)
-        self.language_obj = get_language(language.value)
+        self.parser, self.language_obj = _load_language(language.value)
         self.query_config = LANGUAGE_QUERIES.get(language)
         if not self.query_config:
             raise ValueError(f"Unsupported language: {language}")
 
         # Explicitly use the Query class
-        self.class_query = Query(self.language_obj, self.query_config['class_query'])
-        self.method_query = Query(self.language_obj, self.query_config['method_query'])
-        self.doc_query = Query(self.language_obj, self.query_config['doc_query'])
+        self.definition_query = Query(self.language_obj, self.query_config['definition_query'])
 
     @staticmethod
     def create_treesitter(language: LanguageEnum) -> "Treesitter":
-        return Treesitter(language)
+        return _get_treesitter(language)
 
     def parse(self, file_bytes: bytes) -> tuple[list[TreesitterClassNode], list[TreesitterMethodNode]]:
         tree = self.parser.parse(file_bytes)
         root_node = tree.root_node
 
-        class_results = []
-        method_results = []
+        class_results: list[TreesitterClassNode] = []
+        method_results: list[TreesitterMethodNode] = []
 
-        class_name_by_node = {}
-        class_nodes = []
-        
-        # Use QueryCursor with the compiled class query
-        cursor = QueryCursor(self.class_query)
-        class_matches = cursor.matches(root_node)
-
-        for pattern_index, captures in class_matches:
-            for capture_name, nodes in captures.items():
-                if capture_name == 'class.name':
-                    for node in nodes:
-                        text = node.text
-                        if not text:
-                            continue
-                        class_name = text.decode()
-                        class_node = node.parent
-                        logging.info(f"Found class: {class_name}")
-                        class_name_by_node[class_node.id] = class_name
-                        method_declarations = self._extract_methods_in_class(class_node)
-                        class_results.append(TreesitterClassNode(class_name, method_declarations, class_node))
-                        class_nodes.append(class_node)
-
-        # Run method query with a cursor bound to the method query
-        method_cursor = QueryCursor(self.method_query)
-        method_matches = method_cursor.matches(root_node)
-        for pattern_index, captures in method_matches:
-            for capture_name, nodes in captures.items():
-                if capture_name in ['method.name', 'function.name']:
-                    for node in nodes:
-                        text = node.text
-                        if not text:
-                            continue
-                        method_name = text.decode()
-                        method_node = node.parent
-                        method_source_code = method_node.text.decode() if method_node.text else ''
-                        doc_comment = self._extract_doc_comment(method_node)
-                        parent_class_name = None
-                        for class_node in class_nodes:
-                            if self._is_descendant_of(method_node, class_node):
-                                parent_class_name = class_name_by_node[class_node.id]
-                                break
-                        method_results.append(TreesitterMethodNode(
-                            name=method_name,
-                            doc_comment=doc_comment,
-                            method_source_code=method_source_code,
-                            node=method_node,
-                            class_name=parent_class_name
-                        ))
+        # Method bodies are needed both for the class declarations and the method nodes,
+        # so decode each node's UTF-8 text once and reuse it
+        decoded: dict[int, str] = {}
+
+        def text_of(node: Node) -> str:
+            text = decoded.get(node.id)
+            if text is None:
+                text = node.text.decode() if node.text else ''
+                decoded[node.id] = text
+            return text
+
+        # A single walk with the composite query finds the class names and every
+        # method/function name node
+        classes_by_node: dict[int, TreesitterClassNode] = {}
+        method_name_nodes: list[Node] = []
+        cursor = QueryCursor(self.definition_query)
+        for pattern_index, captures in cursor.matches(root_node):
+            for node in captures.get('class.name', []):
+                class_name = text_of(node)
+                class_node = node.parent
+                if not class_name or class_node is None:
+                    continue
+                logging.info(f"Found class: {class_name}")
+                class_result = TreesitterClassNode(class_name, [], class_node)
+                classes_by_node[class_node.id] = class_result
+                class_results.append(class_result)
+            method_name_nodes.extend(captures.get('method.name', []))
+
+        # Matches complete in tree order of their last capture; report in source order
+        class_results.sort(key=lambda c: c.node.start_byte)
+        method_name_nodes.sort(key=lambda n: n.start_byte)
+
+        for node in method_name_nodes:
+            method_name = text_of(node)
+            method_node = node.parent
+            if not method_name or method_node is None:
+                continue
+            method_source_code = text_of(method_node)
+
+            # Walk up once, stopping at the nearest enclosing class
+            enclosing_class: TreesitterClassNode | None = None
+            current = method_node.parent
+            while current is not None:
+                enclosing_class = classes_by_node.get(current.id)
+                if enclosing_class is not None:
+                    break
+                current = current.parent
+            if enclosing_class is not None:
+                enclosing_class.method_declarations.append(method_source_code)
+
+            method_results.append(TreesitterMethodNode(
+                name=method_name,
+                doc_comment=self._extract_doc_comment(method_node, text_of),
+                method_source_code=method_source_code,
+                node=method_node,
+                class_name=enclosing_class.name if enclosing_class is not None else None,
+                class_node=enclosing_class.node if enclosing_class is not None else None
+            ))
 
         return class_results, method_results
 
-    def _extract_methods_in_class(self, class_node):
-        method_declarations = []
-        # Use QueryCursor bound to method query
-        cursor = QueryCursor(self.method_query)
-        method_matches = cursor.matches(class_node)
-        
-        for pattern_index, captures in method_matches:
-            for capture_name, nodes in captures.items():
-                if capture_name in ['method.name', 'function.name']:
-                    for node in nodes:
-                        text = node.text
-                        if not text:
-                            continue
-                        method_declaration = node.parent.text.decode() if node.parent.text else ''
-                        method_declarations.append(method_declaration)
-        return method_declarations
-
-    def _extract_doc_comment(self, node):
+    def parse_file(self, file_bytes: bytes) -> ParsedFile:
+        classes, methods = self.parse(file_bytes)
+
+        functions: list[dict] = []
+        # Keyed by class node id: nested `Meta`/`Config` classes often share a name
+        methods_by_class: dict[int, list[dict]] = {}
+        for method in methods:
+            entry = {
+                'name': method.name,
+                'doc_comment': method.doc_comment,
+                'code_snippet': method.method_source_code,
+            }
+            if method.class_node is None:
+                functions.append(entry)
+            else:
+                methods_by_class.setdefault(method.class_node.id, []).append(entry)
+
+        return ParsedFile(
+            classes=[{'name': cls.name, 'methods': methods_by_class.get(cls.node.id, [])} for cls in classes],
+            functions=functions,
+        )
+
+    def _extract_doc_comment(self, node: Node, text_of: Callable[[Node], str]) -> str:
+        # Collect the comments/docstrings directly above the node; a plain type check
+        # on each preceding sibling is enough, no query needed
         doc_comment = ''
         current_node = node.prev_sibling
-        # Use QueryCursor bound to doc query
-        cursor = QueryCursor(self.doc_query)
-        
-        while current_node:
-            doc_matches = cursor.matches(current_node)
-            captures_found = False
-            
-            for pattern_index, captures in doc_matches:
-                captures_found = True
-                for cap_name, nodes in captures.items():
-                    if cap_name == 'comment':
-                        for cap_node in nodes:
-                            if cap_node.text:
-                                doc_comment = cap_node.text.decode() + '\n' + doc_comment
-            
-            if captures_found:
-                pass # Continue walking up
-            elif current_node.type not in ['comment', 'block_comment', 'line_comment', 'expression_statement']:
+        while current_node is not None:
+            node_type = current_node.type
+            if node_type in DOC_COMMENT_TYPES:
+                doc_comment = text_of(current_node) + '\n' + doc_comment
+            elif (node_type == 'expression_statement' and current_node.child_count
+                    and current_node.children[0].type == 'string'):
+                doc_comment = text_of(current_node.children[0]) + '\n' + doc_comment
+            else:
                 # Stop if we reach a non-comment node
                 break
-                
             current_node = current_node.prev_sibling
-            
+
         return doc_comment.strip()
 
-    def _is_descendant_of(self, node, ancestor):
-        current = node.parent
-        while current:
-            if current == ancestor:
-                return True
-            current = current.parent
-        return False
+@lru_cache(maxsize=None)
+def _get_treesitter(language: LanguageEnum) -> Treesitter:
+    # Compiling the queries walks the grammar, so build one instance per language and reuse it
+    return Treesitter(language)
 
 # You can add a main execution block here to test the class
 # p-3.py (NEW ENDING)
@@ -258,7 +266,7 @@ def standalone_function(x):
     return x * 2
 """
     try:
-        ts_parser = Treesitter(LanguageEnum.PYTHON)
+        ts_parser = Treesitter.create_treesitter(LanguageEnum.PYTHON)
         classes, methods = ts_parser.parse(bytes(sample_python_code, "utf8"))
         
         print("\n--- Found Classes ---")
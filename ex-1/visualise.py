@@ -1,48 +1,311 @@
 import os
-import json
+import gzip
+import ijson
+import base64
+import hashlib
+import itertools
+import collections
+import jinja2
+import orjson
 import logging
-from pyvis.network import Network
+import simdjson
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Legacy single-object JSON indexes up to this size are parsed in one simdjson pass
+# (fastest); larger ones are streamed with ijson so memory stays flat
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
 
-def generate_html_from_index(index_file="indexed_repo.json", output_html="repo_mindmap.html"):
+# The only per-file keys the mindmap reads; everything else (notably the raw
+# "content" of each file) is left unparsed in the simdjson document
+GRAPH_KEYS = ("path", "classes", "functions")
+
+# vis-network page the mindmap is rendered into; it has a single slot for the
+# preserialized {"nodes", "edges", "options"} payload
+TEMPLATE_FILE = Path(__file__).with_name("mindmap_template.html")
+
+# Repos with at least this many files build their per-file nodes in a process
+# pool, PARALLEL_BATCH_FILES files per task; smaller ones aren't worth the
+# pickling and are built inline
+PARALLEL_MIN_FILES = 5000
+PARALLEL_BATCH_FILES = 500
+PATH_NODE_TYPES = ("folder", "file")
+
+# Longer code snippets are cut off in the tooltips
+SNIPPET_MAX_CHARS = 4096
+
+# Above this many nodes, function and method nodes start out hidden (the page
+# gets a checkbox to show them) so the browser only lays out the structure
+DETAIL_NODE_THRESHOLD = 2000
+DETAIL_NODE_TYPES = ("function", "method")
+
+# Above this many edges, a parent keeps at most FANOUT_EDGE_LIMIT function/method
+# children (the rest are folded into one "+N more" node) and folder -> file
+# edges are left out, since vis.js pays for every edge on every frame
+LARGE_GRAPH_EDGES = 5000
+FANOUT_EDGE_LIMIT = 15
+
+# Above this many nodes the hierarchical layout (O(N*E) in the browser before the
+# first paint) is replaced by positions computed here; they are kept in a
+# <output>.positions.json sidecar so the next run places known nodes the same way
+PRECOMPUTED_LAYOUT_NODES = 10000
+LEVEL_SEPARATION = 200
+ROW_SPACING = 40
+
+# From this many nodes on, edges are drawn straight, hover highlighting is off and
+# edges are skipped while panning/zooming; smaller graphs keep the curved edges
+FAST_RENDER_NODES = 500
+
+
+class IndexFormatError(ValueError):
+    """The index parsed as JSON but its "files" entry has an unexpected shape."""
+
+
+def _to_python(value):
+    """Converts a simdjson Array/Object proxy into a list/dict; scalars pass through."""
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    return value
+
+
+def _slim_record(record):
     """
-    Generates a hierarchical, interactive HTML mindmap visualization
-    from the indexed_repo.json file (assumed to be in the same directory).
-    Nodes for functions, classes, and methods will show code snippets on hover.
+    Copies just the GRAPH_KEYS of a simdjson Object into a plain dict, so the
+    unused payloads are never turned into Python objects.
     """
+    return {key: _to_python(record[key]) for key in GRAPH_KEYS if key in record}
 
-    # --- Load JSON ---
-    if not os.path.exists(index_file):
-        logging.error(f"❌ '{index_file}' not found. Make sure it exists in this folder.")
-        return
 
-    with open(index_file, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            logging.error("❌ Invalid JSON format in indexed_repo.json.")
-            return
+def _read_ndjson(index_file, meta):
+    """
+    Yields (path, filedata) from an NDJSON index as written by indexer.py,
+    one line at a time. The "__commits__" line is stored as
+    meta["commitHistory"]; other non-file lines (the header) are merged
+    into `meta`.
+    """
+    parser = simdjson.Parser()
+    with open(index_file, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = parser.parse(line)
+            filedata = _slim_record(record) if "path" in record else None
+            if filedata is None:
+                if "__commits__" in record:
+                    meta["commitHistory"] = _to_python(record["__commits__"])
+                else:
+                    meta.update(record.as_dict())
+            # The parser's buffer is reused for the next line, so drop the proxy first
+            del record
+            if filedata is not None:
+                yield filedata["path"], filedata
+
+
+def _build_value(events, event, value):
+    """Assemble one complete JSON value from the parse events, starting at `event`."""
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1 if event in ("start_map", "start_array") else 0
+    while depth:
+        _, event, value = next(events)
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+    return builder.value
+
+
+def _stream_files(index_file, meta):
+    """
+    Yields (path, filedata) for each entry of the index's "files" (a list or a
+    path-keyed dict) while reading the file, so only one file's data is held
+    in memory at a time. Other top-level keys are stored in `meta` as they
+    are passed.
+    """
+    with open(index_file, "rb") as f:
+        events = ijson.parse(f, use_float=True)
+        for prefix, event, value in events:
+            if prefix != "" or event != "map_key":
+                continue
+
+            key = value
+            _, event, value = next(events)
+            if key != "files":
+                meta[key] = _build_value(events, event, value)
+            elif event == "start_array":
+                for _, event, value in events:
+                    if event == "end_array":
+                        break
+                    filedata = _build_value(events, event, value)
+                    # Keep only GRAPH_KEYS, so file contents aren't pickled to the workers
+                    filedata = {key: filedata[key] for key in GRAPH_KEYS if key in filedata}
+                    yield filedata["path"], filedata
+            elif event == "start_map":
+                for _, event, path in events:
+                    if event == "end_map":
+                        break
+                    _, event, value = next(events)
+                    filedata = _build_value(events, event, value)
+                    yield path, {key: filedata[key] for key in GRAPH_KEYS if key in filedata}
+            else:
+                raise IndexFormatError("Invalid format for 'files' key.")
+
+
+def _load_files(index_file, meta):
+    """
+    Same contract as _stream_files, but parses the whole index at once with
+    simdjson. Used for indexes small enough to hold in memory.
+    """
+    data = simdjson.Parser().load(index_file)
+
+    for key in data.keys():
+        if key != "files":
+            meta[key] = _to_python(data[key])
 
-    repo_name = data.get("repository", "Unknown Repository")
     files_data = data.get("files", [])
-    commits = data.get("commitHistory", [])
+    if isinstance(files_data, simdjson.Object):
+        for path in files_data.keys():
+            yield path, _slim_record(files_data[path])
+    elif isinstance(files_data, (simdjson.Array, list)):
+        for filedata in files_data:
+            filedata = _slim_record(filedata)
+            yield filedata["path"], filedata
+    else:
+        raise IndexFormatError("Invalid format for 'files' key.")
 
-    logging.info(f"📦 Loaded repository index for '{repo_name}'")
 
-    # --- Initialize Visualization ---
-    net = Network(
-        height="90vh",
-        width="100%",
-        directed=True,
-        bgcolor="#0e1117",
-        font_color="#e8e8e8",
-        heading=f"Repository Mindmap — {repo_name}"
-    )
+def _file_records(filepath, filedata):
+    """
+    Describes the nodes for one file as (node_id, label, title, node_type,
+    snippet, parent) tuples, parents first. Only plain data goes in and out, so
+    this can run in a worker process.
+    """
+    records = []
+    parts = filepath.split("/")
+    current_parent = "repo_root"
+
+    for i, part in enumerate(parts):
+        sub_path = "/".join(parts[:i + 1])
+        node_id = f"path::{sub_path}"
+
+        if i < len(parts) - 1:
+            node_type = "folder"
+            title = f"Folder: {part}"
+        else:
+            node_type = "file"
+            title = f"File: {filepath}"
+
+        records.append((node_id, part, title, node_type, None, current_parent))
+
+        current_parent = node_id
+
+    # --- MODIFICATION: Add AST-level details with code snippets ---
+    if isinstance(filedata, dict):
+
+        # --- Handle Classes ---
+        for cls in filedata.get("classes", []):
+            cls_name = cls.get("name", "Unknown Class")
+            cls_id = f"class::{filepath}::{cls_name}"
+
+            # Get code snippet for the tooltip
+            cls_code = cls.get("code_snippet", "No code snippet available.")
+            records.append((cls_id, cls_name, f"Class: {cls_name}", "class", cls_code, current_parent))
+
+            # --- Handle Methods ---
+            # An index uses one format for all methods, so pick the loop once
+            # from the first entry instead of type-checking every method
+            methods = cls.get("methods", [])
+            if methods and isinstance(methods[0], dict):
+                # New format (dict with details)
+                for method in methods:
+                    method_name = method.get("name", "Unknown Method")
+                    method_code = method.get("code_snippet", "No code snippet available.")
+
+                    # Create a unique ID based on file, class, and method
+                    method_id = f"method::{filepath}::{cls_name}::{method_name}"
+                    records.append((method_id, method_name, f"Method: {method_name}", "method", method_code, cls_id))
+            else:
+                # Old format (simple string)
+                for method in methods:
+                    method_name = method.strip()
+                    method_title = f"Method in {cls_name}: {method_name}\n(No code snippet)"
+
+                    method_id = f"method::{filepath}::{cls_name}::{method_name}"
+                    records.append((method_id, method_name, method_title, "method", None, cls_id))
+
+        # --- Handle Functions ---
+        for fn in filedata.get("functions", []):
+            fn_name = fn.get("name", "Unknown Function")
+            fn_id = f"func::{filepath}::{fn_name}"
+
+            # Get code snippet for the tooltip
+            fn_code = fn.get("code_snippet", "No code snippet available.")
+            records.append((fn_id, fn_name, f"Function: {fn_name}", "function", fn_code, current_parent))
+
+    return records
+
+
+def _batch_records(batch):
+    """_file_records for a list of (filepath, filedata) pairs, flattened."""
+    return [record for filepath, filedata in batch for record in _file_records(filepath, filedata)]
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def _layout_positions(nodes_out, edges, cached):
+    """
+    Assigns every node an (x, y): x from its breadth-first depth below the
+    root nodes, y from a per-depth row counter. Nodes found in `cached` keep
+    their previous position and new ones are stacked below them.
+    """
+    children = collections.defaultdict(list)
+    has_parent = set()
+    for source, target in edges:
+        children[source].append(target)
+        has_parent.add(target)
+
+    # Every column continues below the rows already taken by cached nodes
+    next_row = collections.Counter()
+    for x, y in cached.values():
+        depth = x // LEVEL_SEPARATION
+        next_row[depth] = max(next_row[depth], y // ROW_SPACING + 1)
 
-    # Physics OFF → more tree-like layout
-    net.toggle_physics(False)
+    positions = {}
+    queue = collections.deque((node["id"], 0) for node in nodes_out if node["id"] not in has_parent)
+    while queue:
+        node_id, depth = queue.popleft()
+        if node_id in positions:
+            continue
+        if node_id in cached:
+            positions[node_id] = tuple(cached[node_id])
+        else:
+            positions[node_id] = (depth * LEVEL_SEPARATION, next_row[depth] * ROW_SPACING)
+            next_row[depth] += 1
+        queue.extend((child, depth + 1) for child in children[node_id])
+    return positions
+
+
+def generate_html_from_index(index_file="indexed_repo.ndjson", output_html="repo_mindmap.html"):
+    """
+    Generates a hierarchical, interactive HTML mindmap visualization
+    from the indexed_repo.ndjson file (assumed to be in the same directory).
+    Older single-object indexed_repo.json files are still accepted.
+    Nodes for functions, classes, and methods will show code snippets on hover.
+    """
+
+    # --- Check index ---
+    if not os.path.exists(index_file):
+        logging.error(f"❌ '{index_file}' not found. Make sure it exists in this folder.")
+        return
 
     # --- Node styles ---
     styles = {
@@ -53,131 +316,244 @@ def generate_html_from_index(index_file="indexed_repo.json", output_html="repo_m
         "function": {"color": "#22d3ee", "shape": "dot", "size": 10},
         "method": {"color": "#a855f7", "shape": "dot", "size": 9},
         "commit": {"color": "#f97316", "shape": "triangle", "size": 10},
+        "more": {"color": "#6b7280", "shape": "dot", "size": 8},
     }
 
-    # Add root node (the repository itself)
-    net.add_node("repo_root", label=repo_name, title=f"Repository: {repo_name}", **styles["repo"])
+    # Node/edge dicts are built directly in the format pyvis serializes and handed
+    # over in one go, skipping add_node/add_edge and their per-call list scans
+    font = {"color": "#e8e8e8"}
+    # Everything but id/label/title is fixed per node type, so build it once
+    node_defaults = {
+        node_type: {"group": node_type, "font": font, **style}
+        for node_type, style in styles.items()
+    }
+    seen_ids = set()
+    nodes_out = []
+    edges = []
+    # Code snippets are kept out of the node titles and shipped as one compressed
+    # blob that the page only decodes when the first tooltip is shown. Identical
+    # snippets (boilerplate __init__s, the "no snippet" placeholder, ...) are stored
+    # once under a content hash that the node refers to as "titleRef".
+    snippets = {}
+
+    def snippet_ref(code):
+        digest = hashlib.blake2b(code.encode(), digest_size=8).hexdigest()
+        if digest not in snippets:
+            if len(code) > SNIPPET_MAX_CHARS:
+                code = code[:SNIPPET_MAX_CHARS] + "\n… truncated"
+            snippets[digest] = code
+        return digest
+
+    def queue_node(node_id, label, title, node_type, snippet=None):
+        if node_id in seen_ids:
+            return
+        seen_ids.add(node_id)
+        node = {"id": node_id, "label": label or node_id, "title": title}
+        node.update(node_defaults[node_type])
+        if snippet is not None:
+            node["titleRef"] = snippet_ref(snippet)
+        nodes_out.append(node)
 
-    # --- Detect if files is list or dict ---
-    if isinstance(files_data, dict):
-        iterable = files_data.items()
-    elif isinstance(files_data, list):
-        iterable = [(f["path"], f) for f in files_data]
+    def add_records(records):
+        for node_id, label, title, node_type, snippet, parent in records:
+            # Folders are shared by many files: only their first appearance adds an edge
+            if node_type in PATH_NODE_TYPES and node_id in seen_ids:
+                continue
+            queue_node(node_id, label, title, node_type, snippet)
+            edges.append((parent, node_id))
+
+    # --- Build hierarchical graph while reading the index ---
+    # Keys other than "files" (repository, commitHistory, ...) are collected into meta
+    if index_file.endswith(".ndjson"):
+        read_files = _read_ndjson
+    elif os.path.getsize(index_file) > STREAMING_THRESHOLD_BYTES:
+        read_files = _stream_files
     else:
-        logging.error("❌ Invalid format for 'files' key.")
+        read_files = _load_files
+
+    meta = {}
+    file_count = 0
+    workers = os.cpu_count() or 1
+    try:
+        files = read_files(index_file, meta)
+        head = list(itertools.islice(files, PARALLEL_MIN_FILES))
+        if len(head) < PARALLEL_MIN_FILES or workers < 2:
+            for filepath, filedata in itertools.chain(head, files):
+                file_count += 1
+                add_records(_file_records(filepath, filedata))
+        else:
+            # Batches go to the pool and come back in submission order, so the
+            # graph is identical to the inline build
+            with ProcessPoolExecutor(workers) as executor:
+                pending = collections.deque()
+                for batch in _batched(itertools.chain(head, files), PARALLEL_BATCH_FILES):
+                    file_count += len(batch)
+                    pending.append(executor.submit(_batch_records, batch))
+                    # Bound the batches in flight so a streamed index isn't all read in up front
+                    if len(pending) >= 2 * workers:
+                        add_records(pending.popleft().result())
+                while pending:
+                    add_records(pending.popleft().result())
+    except IndexFormatError as e:
+        logging.error(f"❌ {e}")
+        return
+    except (ijson.JSONError, ValueError):
+        # simdjson reports malformed input as a plain ValueError
+        logging.error(f"❌ Invalid JSON format in '{index_file}'.")
         return
 
-    # --- Build hierarchical graph ---
-    for filepath, filedata in iterable:
-        parts = filepath.split("/")
-        current_parent = "repo_root"
+    repo_name = meta.get("repository", "Unknown Repository")
+    commits = meta.get("commitHistory", [])
 
-        for i, part in enumerate(parts):
-            sub_path = "/".join(parts[:i + 1])
-            node_id = f"path::{sub_path}"
+    logging.info(f"📦 Loaded repository index for '{repo_name}'")
 
-            if i < len(parts) - 1:
-                node_type = "folder"
-                title = f"Folder: {part}"
-            else:
-                node_type = "file"
-                title = f"File: {filepath}"
-
-            if node_id not in net.node_map:
-                net.add_node(node_id, label=part, title=title, **styles[node_type])
-                net.add_edge(current_parent, node_id)
-
-            current_parent = node_id
-
-        # --- MODIFICATION: Add AST-level details with code snippets ---
-        if isinstance(filedata, dict):
-            
-            # --- Handle Classes ---
-            for cls in filedata.get("classes", []):
-                cls_name = cls.get("name", "Unknown Class")
-                cls_id = f"class::{filepath}::{cls_name}"
-                
-                # Get code snippet for the tooltip
-                cls_code = cls.get("code_snippet", "No code snippet available.")
-                cls_title = f"Class: {cls_name}\n\n{cls_code}"
-                
-                net.add_node(cls_id, label=cls_name, title=cls_title, **styles["class"])
-                net.add_edge(current_parent, cls_id)
-
-                # --- Handle Methods ---
-                for method in cls.get("methods", []):
-                    method_name = "Unknown Method"
-                    method_title = ""
-                    
-                    # Handle new format (dict with details)
-                    if isinstance(method, dict):
-                        method_name = method.get("name", "Unknown Method")
-                        method_code = method.get("code_snippet", "No code snippet available.")
-                        method_title = f"Method: {method_name}\n\n{method_code}"
-                    
-                    # Handle old format (simple string)
-                    elif isinstance(method, str):
-                        method_name = method.strip()
-                        method_title = f"Method in {cls_name}: {method_name}\n(No code snippet)"
-                    
-                    # Create a unique ID based on file, class, and method
-                    method_id = f"method::{filepath}::{cls_name}::{method_name}"
-                    net.add_node(method_id, label=method_name, title=method_title, **styles["method"])
-                    net.add_edge(cls_id, method_id)
-
-            # --- Handle Functions ---
-            for fn in filedata.get("functions", []):
-                fn_name = fn.get("name", "Unknown Function")
-                fn_id = f"func::{filepath}::{fn_name}"
-                
-                # Get code snippet for the tooltip
-                fn_code = fn.get("code_snippet", "No code snippet available.")
-                fn_title = f"Function: {fn_name}\n\n{fn_code}"
-                
-                net.add_node(fn_id, label=fn_name, title=fn_title, **styles["function"])
-                net.add_edge(current_parent, fn_id)
+    # Add root node (the repository itself)
+    queue_node("repo_root", repo_name, f"Repository: {repo_name}", "repo")
 
     # --- Optional: add commits ---
     if commits:
         prev_commit = None
         for commit in commits[:8]:  # Limit to first few for clarity
             cid = f"commit::{commit['sha'][:8]}"
-            net.add_node(
+            queue_node(
                 cid,
-                label=commit['sha'][:7],
-                title=f"{commit['message']}\nAuthor: {commit['author']}\nDate: {commit['date']}",
-                **styles["commit"]
+                commit['sha'][:7],
+                f"{commit['message']}\nAuthor: {commit['author']}\nDate: {commit['date']}",
+                "commit"
             )
-            net.add_edge("repo_root", cid)
+            edges.append(("repo_root", cid))
             if prev_commit:
-                net.add_edge(prev_commit, cid)
+                edges.append((prev_commit, cid))
             prev_commit = cid
 
+    # --- Thin out edges on large graphs ---
+    layout_edges = edges
+    if len(edges) > LARGE_GRAPH_EDGES:
+        node_map = {node["id"]: node for node in nodes_out}
+        fanout = collections.Counter()
+        overflow = collections.defaultdict(list)
+        kept_edges = []
+        structural_edges = []
+        # A parent can list the same child twice (e.g. a property getter and its
+        # setter share a method id), so fold over distinct edges only
+        for source, target in dict.fromkeys(edges):
+            source_node, target_node = node_map[source], node_map[target]
+            if source_node["group"] == "folder" and target_node["group"] == "file":
+                # Without the edge the file's place in the tree is only shown by its label
+                target_node["label"] = target.removeprefix("path::")
+                structural_edges.append((source, target))
+                continue
+            if target_node["group"] in DETAIL_NODE_TYPES:
+                fanout[source] += 1
+                if fanout[source] > FANOUT_EDGE_LIMIT:
+                    overflow[source].append(target_node)
+                    continue
+            kept_edges.append((source, target))
+
+        folded_ids = {node["id"] for children in overflow.values() for node in children}
+        nodes_out = [node for node in nodes_out if node["id"] not in folded_ids]
+        kept_edges = [
+            (source, target) for source, target in kept_edges
+            if source not in folded_ids and target not in folded_ids
+        ]
+        used_refs = {node["titleRef"] for node in nodes_out if "titleRef" in node}
+        snippets = {digest: code for digest, code in snippets.items() if digest in used_refs}
+        for parent, children in overflow.items():
+            more_id = f"more::{parent}"
+            nodes_out.append({
+                "id": more_id, "label": f"+{len(children)} more",
+                "title": "\n".join(node["label"] for node in children),
+                # Shown and hidden together with the nodes it stands in for
+                "group": children[0]["group"], "font": font, **styles["more"]
+            })
+            kept_edges.append((parent, more_id))
+
+        logging.info(f"{len(edges)} edges: kept {len(kept_edges)} after folding fan-out and folder edges")
+        edges = kept_edges
+        # The precomputed layout still places files under their folders
+        layout_edges = kept_edges + structural_edges
+
+    # --- Collapse details on large graphs ---
+    details_hidden = len(nodes_out) > DETAIL_NODE_THRESHOLD
+    if details_hidden:
+        for node in nodes_out:
+            if node["group"] in DETAIL_NODE_TYPES:
+                node["hidden"] = True
+        logging.info(f"{len(nodes_out)} nodes: function and method nodes are hidden by default")
+
     # --- Layout Settings ---
-    net.set_options("""
-    {
-      "layout": {
-        "hierarchical": {
-          "enabled": true,
-          "direction": "LR",
-          "sortMethod": "hubsize",
-          "levelSeparation": 200,
-          "nodeSpacing": 150
+    options = {
+        "layout": {
+            "hierarchical": {
+                "enabled": True,
+                "direction": "LR",
+                "sortMethod": "hubsize",
+                "levelSeparation": 200,
+                "nodeSpacing": 150
+            }
+        },
+        "interaction": {
+            "navigationButtons": True,
+            "keyboard": True,
+            "tooltipDelay": 200
         }
-      },
-      "interaction": {
-        "navigationButtons": true,
-        "keyboard": true,
-        "tooltipDelay": 200
-      }
     }
-    """)
 
-    # --- Save and Report ---
-    net.save_graph(output_html)
-    logging.info(f"✅ Mindmap HTML generated: {output_html}")
-    logging.info(f"Files visualized: {len(list(iterable))}")
+    if len(nodes_out) >= FAST_RENDER_NODES:
+        options["interaction"].update({"hover": False, "hideEdgesOnDrag": True, "hideEdgesOnZoom": True})
+        options["edges"] = {"smooth": False}
+        options["nodes"] = {"shapeProperties": {"interpolation": False}}
+
+    # --- Precomputed layout for very large graphs ---
+    if len(nodes_out) > PRECOMPUTED_LAYOUT_NODES:
+        positions_file = Path(output_html).with_suffix(".positions.json")
+        try:
+            cached = orjson.loads(positions_file.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            cached = {}
+
+        positions = _layout_positions(nodes_out, layout_edges, cached)
+        for node in nodes_out:
+            node["x"], node["y"] = positions[node["id"]]
+            node["fixed"] = {"x": True, "y": True}
+            node["physics"] = False
+        positions_file.write_bytes(orjson.dumps(positions))
 
+        options["layout"]["hierarchical"]["enabled"] = False
+        options["physics"] = {"enabled": False}
+        logging.info(f"{len(nodes_out)} nodes: using precomputed positions ({positions_file})")
+
+    # --- Render and Save ---
+    # The whole graph is dumped once and spliced into the template as a single string,
+    # instead of pyvis's save_graph rendering it through Jinja node by node
+    # The page gets small integer ids (vis.js accepts any id) instead of the long
+    # "kind::path::name" keys, which stay in use on this side for dedup and the
+    # layout sidecar because they are stable from one run to the next
+    index_of = {node["id"]: i for i, node in enumerate(nodes_out)}
+    for i, node in enumerate(nodes_out):
+        node["id"] = i
+    payload = orjson.dumps({
+        "nodes": nodes_out,
+        "edges": [{"from": index_of[source], "to": index_of[target], "arrows": "to"} for source, target in edges],
+        "options": options,
+    })
+    # Keep code snippets containing "</script>" from closing the script block early
+    payload = payload.replace(b"</", b"<\\/")
+
+    snippets_blob = base64.b64encode(gzip.compress(orjson.dumps(snippets), compresslevel=6, mtime=0))
+
+    template = jinja2.Template(TEMPLATE_FILE.read_text(encoding="utf-8"))
+    html = template.render(
+        heading=f"Repository Mindmap — {repo_name}",
+        bgcolor="#0e1117",
+        font_color=font["color"],
+        details_hidden=details_hidden,
+        data_json=payload.decode(),
+        snippets_b64=snippets_blob.decode("ascii"),
+    )
+    Path(output_html).write_text(html, encoding="utf-8")
+    logging.info(f"✅ Mindmap HTML generated: {output_html}")
+    logging.info(f"Files visualized: {file_count}")
 
 if __name__ == "__main__":
     generate_html_from_index()
\ No newline at end of file
@@ -1,134 +1,262 @@
-# parser.py
+# p-2.py
 # Universal Python code analyzer using Tree-sitter.
 # Requires:
 #   pip install tree-sitter tree-sitter-language-pack
 
+import sys
+
 from tree_sitter_language_pack import get_parser, get_language
 from tree_sitter import Query, QueryCursor
 
 
+# Sections reported by analyze_python_bytes, in output order
+SECTIONS = [
+    "Functions",
+    "Classes",
+    "Function Parameters",
+    "Function Calls",
+    "Imports",
+    "Return Statements",
+    "Assignments",
+    "Decorators",
+    "Loops",
+    "If Conditions",
+]
+
+# Sections that still need a query: "Return Statements" matches the `expression`
+# supertype and "Decorators" several nested alternatives. The rest are collected
+# by _walk_tree in a single pass.
+QUERIES = {
+    "Return Statements": """
+        (return_statement
+            (expression) @return.expr)
+    """,
+    "Decorators": """
+        [
+            ;; simple decorator like @name
+            (decorator (identifier) @decorator.name)
+            ;; decorator that's a call: @name(...) or @module.name(...)
+            (decorator (call (identifier) @decorator.name))
+            (decorator (call (attribute (identifier) @decorator.name)))
+            ;; decorator that's an attribute: @module.name
+            (decorator (attribute (identifier) @decorator.name))
+            ;; fallback: capture the whole decorator node text
+            (decorator) @decorator.node
+        ]
+    """,
+}
+
+
+def _function_definition(node, add):
+    add("Functions", node.child_by_field_name("name"))
+    parameters = node.child_by_field_name("parameters")
+    if parameters is not None:
+        for child in parameters.named_children:
+            if child.type == "identifier":
+                add("Function Parameters", child)
+
+
+def _class_definition(node, add):
+    add("Classes", node.child_by_field_name("name"))
+
+
+def _call(node, add):
+    function = node.child_by_field_name("function")
+    if function is not None and function.type == "identifier":
+        add("Function Calls", function)
+
+
+def _import_statement(node, add):
+    for child in node.named_children:
+        if child.type == "dotted_name":
+            add("Imports", child)
+        elif child.type == "aliased_import":
+            for name in child.named_children:
+                if name.type == "dotted_name":
+                    add("Imports", name)
+
+
+def _import_from_statement(node, add):
+    for child in node.named_children:
+        if child.type == "dotted_name":
+            add("Imports", child)
+
+
+def _assignment(node, add):
+    left = node.child_by_field_name("left")
+    if left is not None and left.type == "identifier":
+        add("Assignments", left)
+
+
+def _for_statement(node, add):
+    for child in node.named_children:
+        if child.type == "identifier":
+            add("Loops", child)
+
+
+def _while_statement(node, add):
+    add("Loops", node)
+
+
+def _if_statement(node, add):
+    add("If Conditions", node.child_by_field_name("condition"))
+
+
+# node.type -> collector for the sections that don't need a query
+NODE_COLLECTORS = {
+    "function_definition": _function_definition,
+    "class_definition": _class_definition,
+    "call": _call,
+    "import_statement": _import_statement,
+    "import_from_statement": _import_from_statement,
+    "assignment": _assignment,
+    "for_statement": _for_statement,
+    "while_statement": _while_statement,
+    "if_statement": _if_statement,
+}
+
+
+def _collectors_by_kind_id():
+    # node.kind_id is a plain int read from the C node, whereas node.type builds a
+    # new str on every access; map every grammar symbol id to its collector once
+    collectors = {}
+    for kind_id in range(_LANGUAGE.node_kind_count):
+        collector = NODE_COLLECTORS.get(_LANGUAGE.node_kind_for_id(kind_id))
+        if collector is not None and _LANGUAGE.node_kind_is_named(kind_id):
+            collectors[kind_id] = collector
+    return collectors
+
+
+def _walk_tree(root, add):
+    """Depth-first walk with a TreeCursor, handing each node to its collector."""
+    collectors = _COLLECTORS
+    cursor = root.walk()
+    while True:
+        node = cursor.node
+        collector = collectors.get(node.kind_id)
+        if collector is not None:
+            collector(node, add)
+        if cursor.goto_first_child():
+            continue
+        while not cursor.goto_next_sibling():
+            if not cursor.goto_parent():
+                return
+
+
+def _compile_queries():
+    # Compile every query once at import; a bad pattern is reported and that
+    # query is skipped so it doesn't abort the whole analysis.
+    compiled = {}
+    for name, query_str in QUERIES.items():
+        try:
+            compiled[name] = Query(_LANGUAGE, query_str)
+        except Exception as e:
+            print(f"\n✗ QUERY ERROR for '{name}': {e}")
+            compiled[name] = None
+    return compiled
+
+
+_LANGUAGE = get_language('python')
+_QUERIES = _compile_queries()
+_COLLECTORS = _collectors_by_kind_id()
+# One parser for every call; it keeps its lexer buffers between parses
+_PARSER = get_parser('python')
+
+
 def analyze_python_code(code_snippet):
-    print("\n=== Python Code Analysis ===")
-    print(f"\nCode Snippet:\n```python\n{code_snippet.strip()}\n```")
+    """Analyze Python source given as str (encoded once here) or as bytes."""
+    if isinstance(code_snippet, str):
+        code_snippet = code_snippet.encode("utf8")
+    return analyze_python_bytes(code_snippet)
+
+
+def analyze_python_bytes(code_bytes):
+    """Return {section: sorted unique texts} for UTF-8 encoded Python source."""
+    return _analyze_tree(_PARSER.parse(code_bytes).root_node)
+
+
+def _analyze_tree(root):
+    # A dict per section used as an ordered set: repeated texts are dropped as they arrive
+    captured = {name: {} for name in SECTIONS}
+    # Decoded text per byte range, shared by all sections: a node collected
+    # more than once is only decoded once
+    decoded = {}
+
+    def add(name, node):
+        if node is None:
+            return
+        key = (node.start_byte, node.end_byte)
+        if key in decoded:
+            text = decoded[key]
+        else:
+            try:
+                text = node.text.decode("utf8").strip() if node.text else None
+            except Exception:
+                # defensive: skip nodes we can't decode
+                text = None
+            decoded[key] = text
+        if text is not None:
+            captured[name][text] = None
+
+    _walk_tree(root, add)
+
+    for name, query in _QUERIES.items():
+        if query is None:
+            continue
+
+        try:
+            cursor = QueryCursor(query)
+            matches = cursor.matches(root)
+        except Exception as e:
+            print(f"\n✗ QueryCursor error for '{name}': {e}")
+            continue
+
+        for pattern_index, captures in matches:
+            for capture_name, nodes in captures.items():
+                for node in nodes:
+                    add(name, node)
+
+    return {name: sorted(texts) for name, texts in captured.items()}
+
+
+def print_analysis(code_snippet):
+    """
+    Print a human-readable analysis report. The report is built up in a list
+    and written with a single sys.stdout.write; bulk callers should use
+    analyze_python_code/analyze_python_bytes and skip the report entirely.
+    """
+    if isinstance(code_snippet, str):
+        code_snippet = code_snippet.encode("utf8")
+
+    buf = ["\n=== Python Code Analysis ===\n"]
+    buf.append(f"\nCode Snippet:\n```python\n{code_snippet.decode('utf8', 'replace').strip()}\n```\n")
 
     try:
-        parser = get_parser('python')
-        language = get_language('python')
-        tree = parser.parse(bytes(code_snippet, "utf8"))
+        tree = _PARSER.parse(code_snippet)
         root = tree.root_node
 
-        print("\n--- Parsing Info ---")
-        print("✓ Code parsed successfully!")
-        print(f"Root type: {root.type}, total length: {root.end_byte} bytes")
-
-        # --- Updated Queries (100% compatible) ---
-        queries = {
-            "Functions": """
-                (function_definition
-                    name: (identifier) @function.name)
-            """,
-            "Classes": """
-                (class_definition
-                    name: (identifier) @class.name)
-            """,
-            "Function Parameters": """
-                (function_definition
-                    parameters: (parameters
-                        (identifier) @param.name))
-            """,
-            "Function Calls": """
-                (call
-                    function: (identifier) @call.name)
-            """,
-            # ✅ FIXED import query
-            "Imports": """
-                [
-                    (import_statement (dotted_name) @import.module)
-                    (import_statement (aliased_import (dotted_name) @import.alias))
-                    (import_from_statement (dotted_name) @from.module)
-                ]
-            """,
-            "Return Statements": """
-                (return_statement
-                    (expression) @return.expr)
-            """,
-            "Assignments": """
-                (assignment
-                    left: (identifier) @var.name)
-            """,
-                        "Decorators": """
-                                [
-                                    ;; simple decorator like @name
-                                    (decorator (identifier) @decorator.name)
-                                    ;; decorator that's a call: @name(...) or @module.name(...)
-                                    (decorator (call (identifier) @decorator.name))
-                                    (decorator (call (attribute (identifier) @decorator.name)))
-                                    ;; decorator that's an attribute: @module.name
-                                    (decorator (attribute (identifier) @decorator.name))
-                                    ;; fallback: capture the whole decorator node text
-                                    (decorator) @decorator.node
-                                ]
-                        """,
-            "Loops": """
-                [
-                    (for_statement (identifier) @loop.var)
-                    (while_statement) @while.loop
-                ]
-            """,
-            "If Conditions": """
-                (if_statement
-                    condition: (_) @if.condition)
-            """,
-        }
-
-
-        results = {}
-        for name, query_str in queries.items():
-            # Build Query and QueryCursor per-query so a single bad pattern
-            # doesn't abort the whole analysis. Report which query fails.
-            try:
-                query = Query(language, query_str)
-            except Exception as e:
-                print(f"\n✗ QUERY ERROR for '{name}': {e}")
-                results[name] = []
-                continue
+        buf.append("\n--- Parsing Info ---\n")
+        buf.append("✓ Code parsed successfully!\n")
+        buf.append(f"Root type: {root.type}, total length: {root.end_byte} bytes\n")
 
-            try:
-                cursor = QueryCursor(query)
-                matches = cursor.matches(root)
-            except Exception as e:
-                print(f"\n✗ QueryCursor error for '{name}': {e}")
-                results[name] = []
-                continue
-
-            captured = []
-            for pattern_index, captures in matches:
-                for capture_name, nodes in captures.items():
-                    for node in nodes:
-                        try:
-                            if node.text:
-                                text = node.text.decode("utf8").strip()
-                                captured.append(text)
-                        except Exception:
-                            # defensive: skip nodes we can't decode
-                            continue
-
-            results[name] = list(sorted(set(captured)))
+        results = _analyze_tree(root)
 
         # --- Output ---
-        print("\n--- Analysis Results ---")
+        buf.append("\n--- Analysis Results ---\n")
         for key, items in results.items():
-            print(f"\n{key}:")
+            buf.append(f"\n{key}:\n")
             if items:
                 for item in items:
-                    print(f"  • {item}")
+                    buf.append(f"  • {item}\n")
             else:
-                print("  (none found)")
+                buf.append("  (none found)\n")
 
     except Exception as e:
-        print(f"\n✗ ERROR: Could not parse the code.")
-        print(f"  Make sure you installed 'tree-sitter' and 'tree-sitter-language-pack'")
-        print(f"  Details: {e}")
+        buf.append(f"\n✗ ERROR: Could not parse the code.\n")
+        buf.append(f"  Make sure you installed 'tree-sitter' and 'tree-sitter-language-pack'\n")
+        buf.append(f"  Details: {e}\n")
+
+    sys.stdout.write("".join(buf))
 
 
 if __name__ == "__main__":
@@ -151,4 +279,4 @@ def square_root(x):
 for i in range(5):
     print(calculate_sum(i, 2))
 """
-    analyze_python_code(sample_code)
+    print_analysis(sample_code)